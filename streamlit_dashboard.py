@@ -1,10 +1,22 @@
+from __future__ import annotations
+
 import streamlit as st
 import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Optional
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+import os
+import pickle
+import tempfile
+import threading
 import time
 import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 
 # 페이지 설정
 st.set_page_config(
@@ -14,8 +26,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# CSS 스타일링
-st.markdown("""
+# CSS 스타일링 (재실행마다 다시 전송되므로 실제 쓰는 규칙만 한 줄로 보냄)
+_CSS = " ".join("""
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -24,47 +36,9 @@ st.markdown("""
         text-align: center;
         margin-bottom: 2rem;
     }
-    .metric-card {
-        background-color: #f0f2f6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #1f77b4;
-    }
-    .positive-change {
-        color: #28a745;
-        font-weight: bold;
-    }
-    .negative-change {
-        color: #dc3545;
-        font-weight: bold;
-    }
-    .neutral-change {
-        color: #6c757d;
-        font-weight: bold;
-    }
-    .status-stable {
-        background-color: #d4edda;
-        color: #155724;
-        padding: 0.25rem 0.5rem;
-        border-radius: 0.25rem;
-        font-size: 0.875rem;
-    }
-    .status-rising {
-        background-color: #cce5ff;
-        color: #004085;
-        padding: 0.25rem 0.5rem;
-        border-radius: 0.25rem;
-        font-size: 0.875rem;
-    }
-    .status-falling {
-        background-color: #f8d7da;
-        color: #721c24;
-        padding: 0.25rem 0.5rem;
-        border-radius: 0.25rem;
-        font-size: 0.875rem;
-    }
 </style>
-""", unsafe_allow_html=True)
+""".split())
+st.markdown(_CSS, unsafe_allow_html=True)
 
 # 지수 데이터 설정: 구리(Copper) 추가됨 (HG=F: Copper Futures)
 TICKER_MAP = {
@@ -82,175 +56,597 @@ TICKER_MAP = {
     'vix': {'symbol': '^VIX', 'name': '변동성 지수 (VIX)', 'ticker': 'VIX'},
 }
 
+# 각 지수별 위험 신호 방향 정의
+RISK_INDICATORS = {
+    'gold': 'up',      # 금 상승 = 위험 증가
+    'silver': 'up',    # 은 상승 = 위험 증가
+    'copper': 'up',    # 구리 상승 = 위험 증가 (경기 과열/인플레)
+    'dxy': 'up',       # 달러지수 상승 = 위험 증가
+    'us10y': 'up',     # 채권 금리 상승 = 위험 증가
+    'btc': 'up',       # 비트코인 상승 = 위험 증가
+    'krwjpy': 'down',  # 원-엔 하락 = 원화 약세 = 위험 증가
+    'krwusd': 'up',    # 원-달러 상승 = 원화 약세 = 위험 증가
+    'usdjpy': 'both',  # 달러-엔은 급변동 자체가 위험
+    'vix': 'up',       # VIX 상승 = 위험 증가
+    'spx': 'down',     # S&P500 하락 = 위험 증가
+    'ndx': 'down',     # 나스닥100 하락 = 위험 증가
+}
 
-def get_unit(symbol):
-    """심볼에 따른 단위 반환"""
-    if symbol in ['^TNX']:
-        return 'percentage'
-    elif symbol in ['DX-Y.NYB', '^SKEW', '^VIX', '^GSPC']:
-        return 'points'
-    return 'currency'
-
-def format_value(value, unit):
-    """값을 단위에 맞게 포맷팅"""
-    if unit == 'percentage':
-        return f"{value:.2f}%"
-    elif unit == 'points':
-        return f"{value:.2f}"
-    else:  # currency
-        return f"${value:,.2f}"
-
-def get_status_class(change_pct):
-    """변화율에 따른 상태 클래스 반환"""
-    if abs(change_pct) < 1:
-        return "status-stable"
-    elif change_pct > 0:
-        return "status-rising"
-    else:
-        return "status-falling"
-
-def get_change_class(change_pct):
-    """변화율에 따른 색상 클래스 반환"""
-    if change_pct > 0:
-        return "positive-change"
-    elif change_pct < 0:
-        return "negative-change"
-    else:
-        return "neutral-change"
+# 심볼별 단위 (목록에 없으면 currency)
+_UNIT_BY_SYMBOL = {
+    '^TNX': 'percentage',
+    'DX-Y.NYB': 'points',
+    '^SKEW': 'points',
+    '^VIX': 'points',
+    '^GSPC': 'points',
+}
 
-@st.cache_data(ttl=60)  # 1분 캐시
-def fetch_market_data():
-    """시장 데이터 가져오기"""
-    data = []
-    
-    for key, info in TICKER_MAP.items():
+# 단위별 값 포맷터
+_FORMATTERS = {
+    'percentage': '{:.2f}%'.format,
+    'points': '{:.2f}'.format,
+    'currency': '${:,.2f}'.format,
+}
+
+# 심볼에서 정해지는 단위/포맷터/상승 선호 여부는 시작 시 한 번만 계산해 TICKER_MAP에 기록
+for _info in TICKER_MAP.values():
+    _info['unit'] = _UNIT_BY_SYMBOL.get(_info['symbol'], 'currency')
+    _info['formatter'] = _FORMATTERS[_info['unit']]
+    _info['positive_is_good'] = not _info['symbol'].startswith('^')
+del _info
+
+# 상태 셀 스타일: 🔴 위험 / 🔵 안전 / ⚪ 중립 (그 외 상태)
+_DANGER_STYLE = 'background-color: #dc3545; color: white; font-weight: bold'
+_SAFE_STYLE = 'background-color: #007bff; color: white; font-weight: bold'
+_NEUTRAL_STYLE = 'background-color: #6c757d; color: white'
+_DANGER_STATUSES = ('위험↑', '위험↓')
+_SAFE_STATUSES = ('안전↑', '안전↓')
+# 변화율 셀 글자색: 상승(+) 초록 / 하락(-) 빨강
+_RISE_TEXT_STYLE = 'color: #28a745; font-weight: bold'
+_FALL_TEXT_STYLE = 'color: #dc3545; font-weight: bold'
+
+# 직전/최근 종가 조회 기간: 배치 결과는 시장별 휴장일이 NaN으로 섞이므로
+# 2일이 아니라 며칠 여유를 두고 받아 결측을 뺀 마지막 두 종가를 사용
+RECENT_CLOSE_PERIOD = "5d"
+# 위 기간에서 종가가 하나뿐인 심볼(장기 휴장 등)은 개별 조회로 더 넓게 받음
+RECENT_CLOSE_FALLBACK_PERIOD = "1mo"
+
+# 서버 재시작 후에도 유지되는 디스크 캐시 위치
+CACHE_DIR = Path(__file__).resolve().parent / '.cache'
+
+# 백그라운드 시장 데이터 갱신 주기 (초)
+WARMER_INTERVAL_SEC = 30
+# 공유/디스크 시장 스냅샷의 최대 허용 나이 (초): 넘으면 직접 다시 조회
+MARKET_SNAPSHOT_TTL_SEC = 60
+
+# Yahoo spark 엔드포인트 (여러 심볼의 최근 종가를 한 요청으로 조회, 요청당 최대 심볼 수)
+SPARK_URL = "https://query1.finance.yahoo.com/v8/finance/spark"
+SPARK_MAX_SYMBOLS = 20
+
+# 심볼별 개별 조회 병렬 설정 (최대 동시 요청 수, 전체 제한 시간 초)
+FETCH_MAX_WORKERS = 16
+FETCH_TIMEOUT_SEC = 30
+# Yahoo 개별 조회 재시도 설정 (시도 횟수, 첫 대기 초 - 시도마다 2배)
+YAHOO_RETRIES = 3
+YAHOO_BACKOFF_SEC = 0.3
+
+# 차트 trace당 최대 점 개수 (초과 시 간격 샘플링)
+_MAX_POINTS_PER_TRACE = 2000
+# 기준=100 단일 차트의 trace당 점 개수 (LTTB 다운샘플링)
+_REBASED_MAX_POINTS = 500
+# 차트 이력 기본 조회 기간 (년): 이 기간 안쪽 구간은 이 이력을 잘라서 사용
+HISTORY_BASE_YEARS = 5
+
+# 페어 트레이딩 전략 설명 (정적 문서)
+_STRATEGY_MD = """
+## 신호 단계 설명
+
+- 🟢🟢 **강력매수**: 극단적 저평가, 높은 확신도
+- 🟢 **매수**: 명확한 저평가 신호
+- 🟡 **중립**: 정상 범위, 대기
+- 🔴 **매도**: 명확한 고평가 신호
+- 🔴🔴 **강력매도**: 극단적 고평가, 높은 확신도
+
+---
+
+### 1. 금-은 페어 트레이딩
+- **🟢🟢 강력**: 금은비율 > 90 또는 < 60
+- **🟢/🔴 일반**: 금은비율 82-90 또는 60-68
+- **🟡 중립**: 금은비율 68-82 (정상)
+- **역사적 평균**: 약 75
+
+### 2. VIX 채권-주식 페어
+- **🟢🟢 주식 강력매수**: VIX > 35 (극도의 공포)
+- **🟢 주식 매수**: VIX 25-35 (높은 공포)
+- **🟡 중립**: VIX 15-25 (정상)
+- **🔴 주식 매도**: VIX 12-15 (낮은 공포)
+- **🔴🔴 주식 강력매도**: VIX < 12 (극도의 낙관)
+
+### 3. 달러-엔 캐리 트레이드
+- **🟢🟢 엔화 강력매수**: USD/JPY > 160 (엔화 극약세)
+- **🟢 엔화 매수**: USD/JPY 152-160
+- **🟡 중립**: USD/JPY 142-152 (정상)
+- **🔴 달러 매수**: USD/JPY 135-142
+- **🔴🔴 달러 강력매수**: USD/JPY < 135 (캐리 청산 완료)
+
+### 4. S&P-나스닥 페어
+- **🟢🟢 S&P 강력매수**: 격차 > +3.0%p (기술주 극과열)
+- **🟢 S&P 매수**: 격차 +1.5 ~ +3.0%p
+- **🟡 중립**: 격차 -1.5 ~ +1.5%p (균형)
+- **🔴 나스닥 매수**: 격차 -3.0 ~ -1.5%p
+- **🔴🔴 나스닥 강력매수**: 격차 < -3.0%p (기술주 극약세)
+"""
+
+
+def _load_disk_cache(name, ttl, validate=None):
+    """TTL 이내에 저장된 디스크 캐시 로드 (없음/만료/손상 시 None)"""
+    path = CACHE_DIR / f"{name}.pkl"
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        with path.open('rb') as f:
+            value = pickle.load(f)
+    except Exception:
+        return None
+    if validate is not None and not validate(value):
+        return None
+    return value
+
+def _save_disk_cache(name, value):
+    """디스크 캐시 저장 (임시 파일 작성 후 교체)"""
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f)
+        os.replace(tmp, CACHE_DIR / f"{name}.pkl")
+    except Exception:
+        pass
+
+def _load_parquet_cache(name, ttl):
+    """TTL 이내에 저장된 Parquet 디스크 캐시 로드 (없음/만료/손상 시 None)"""
+    path = CACHE_DIR / f"{name}.parquet"
+    try:
+        if time.time() - path.stat().st_mtime > ttl:
+            return None
+        return pd.read_parquet(path)
+    except Exception:
+        return None
+
+def _save_parquet_cache(name, df):
+    """DataFrame을 Parquet 디스크 캐시로 저장 (임시 파일 작성 후 교체)"""
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        df.to_parquet(tmp)
+        os.replace(tmp, CACHE_DIR / f"{name}.parquet")
+    except Exception:
+        pass
+
+@st.cache_resource(show_spinner=False)
+def _inflight_registry():
+    """진행 중인 요청 레지스트리 (스크립트 재실행과 무관하게 프로세스당 하나)"""
+    return {}, threading.Lock()
+
+def _coalesce(key, fn, registry=None):
+    """같은 키의 요청이 이미 진행 중이면 새로 보내지 않고 그 결과를 기다림"""
+    inflight, lock = registry or _inflight_registry()
+    with lock:
+        fut = inflight.get(key)
+        is_owner = fut is None
+        if is_owner:
+            fut = Future()
+            inflight[key] = fut
+    if not is_owner:
+        return fut.result()
+
+    try:
+        fut.set_result(fn())
+    except Exception as e:
+        fut.set_exception(e)
+    finally:
+        with lock:
+            inflight.pop(key, None)
+    return fut.result()
+
+def _last_two_closes(hist, min_closes=1):
+    """가격 이력에서 (직전 종가, 최근 종가) 반환 (종가가 min_closes개 미만이면 None)"""
+    closes = hist['Close'].to_numpy(dtype=float)
+    closes = closes[~np.isnan(closes)]
+    n = closes.size
+    if not n or n < min_closes:
+        return None
+    current_price = float(closes[-1])
+    # 데이터가 하나뿐이면 직전 종가를 최근 종가로 둡니다
+    previous_price = float(closes[-2]) if n >= 2 else current_price
+    return previous_price, current_price
+
+def _parallel_by_symbol(fn, symbols, timeout=FETCH_TIMEOUT_SEC):
+    """심볼별 조회를 스레드 풀에서 병렬 실행 ({심볼: 결과}, 제한 시간 초과 시 None)"""
+    ex = ThreadPoolExecutor(max_workers=max(1, min(FETCH_MAX_WORKERS, len(symbols))))
+    try:
+        futures = {symbol: ex.submit(fn, symbol) for symbol in symbols}
+        done, _ = wait(futures.values(), timeout=timeout)
+        return {
+            symbol: fut.result() if fut in done and fut.exception() is None else None
+            for symbol, fut in futures.items()
+        }
+    finally:
+        # 제한 시간을 넘긴 요청은 기다리지 않음
+        ex.shutdown(wait=False, cancel_futures=True)
+
+def _yahoo_history(ticker, **kwargs):
+    """Ticker.history 호출 (레이트 리밋 등 일시적 오류는 백오프 후 재시도)"""
+    for attempt in range(YAHOO_RETRIES):
         try:
-            ticker = yf.Ticker(info['symbol'])
-            hist = ticker.history(period="2d")
-            
-            if len(hist) >= 2:
-                current_price = hist['Close'].iloc[-1]
-                previous_price = hist['Close'].iloc[-2]
-                change_pct = ((current_price - previous_price) / previous_price) * 100
-            else:
-                current_price = hist['Close'].iloc[-1] if not hist.empty else 0
-                previous_price = current_price # Set previous to current if only one data point exists
-                change_pct = 0
-            
-            unit = get_unit(info['symbol'])
-            status = "안정" if abs(change_pct) < 1 else ("상승" if change_pct > 0 else "하락")
-            
-            data.append({
-                'id': key,
-                'name': info['name'],
-                'ticker': info['ticker'],
-                'current_value': current_price,
-                'previous_value': previous_price,
-                'change_pct': change_pct,
-                'unit': unit,
-                'status': status,
-                'formatted_value': format_value(current_price, unit),
-                'positive_is_good': not info['symbol'].startswith('^')
-            })
-            
-        except Exception as e:
-            # st.error(f"Error fetching data for {info['name']}: {str(e)}")
-            data.append({
-                'id': key,
-                'name': info['name'],
-                'ticker': info['ticker'],
-                'current_value': 0,
-                'previous_value': 0,
-                'change_pct': 0,
-                'unit': get_unit(info['symbol']),
-                'status': "오류",
-                'formatted_value': "N/A",
-                'positive_is_good': True
-            })
-    
-    return data
+            return ticker.history(**kwargs)
+        except Exception:
+            if attempt == YAHOO_RETRIES - 1:
+                raise
+            time.sleep(YAHOO_BACKOFF_SEC * 2 ** attempt)
+
+def _fetch_one(symbol):
+    """단일 심볼 개별 조회 (배치 요청에서 누락된 심볼의 대체 경로)"""
+    try:
+        return _last_two_closes(_yahoo_history(yf.Ticker(symbol), period=RECENT_CLOSE_FALLBACK_PERIOD))
+    except Exception:
+        return None
+
+def _spark_closes(payload):
+    """spark 응답에서 {심볼: 종가 목록} 추출 (v8 평면형/v7 중첩형 응답 모두 처리)"""
+    if 'spark' not in payload:
+        # v8: {심볼: {"timestamp": [...], "close": [...]}}
+        return {
+            symbol: item.get('close')
+            for symbol, item in payload.items() if isinstance(item, dict)
+        }
+    # v7: {"spark": {"result": [{"symbol": ..., "response": [{"indicators": {"quote": [{"close": [...]}]}}]}]}}
+    closes = {}
+    for item in payload['spark'].get('result') or []:
+        try:
+            closes[item['symbol']] = item['response'][0]['indicators']['quote'][0]['close']
+        except (KeyError, IndexError, TypeError):
+            continue
+    return closes
+
+def _fetch_spark_pairs(symbols):
+    """spark 엔드포인트로 여러 심볼의 (직전 종가, 최근 종가)를 한 번에 조회"""
+    # yfinance 내부 모듈이라 이동/변경되면 ImportError → 호출부에서 배치 조회로 대체
+    from yfinance.data import YfData
+    pairs = {}
+    for i in range(0, len(symbols), SPARK_MAX_SYMBOLS):
+        chunk = symbols[i:i + SPARK_MAX_SYMBOLS]
+        # yfinance 공유 세션(쿠키/crumb 처리 포함)으로 요청
+        payload = YfData().get_raw_json(
+            SPARK_URL,
+            params={'symbols': ','.join(chunk), 'range': RECENT_CLOSE_PERIOD, 'interval': '1d'},
+            timeout=10
+        )
+        for symbol, closes in _spark_closes(payload).items():
+            if symbol in chunk and closes:
+                # 종가가 하나뿐이면 변화율이 0으로 보이므로 개별 조회로 넘김
+                pair = _last_two_closes(pd.DataFrame({'Close': closes}, dtype=float), min_closes=2)
+                if pair is not None:
+                    pairs[symbol] = pair
+    return pairs
+
+def _download_recent_closes(symbols):
+    """심볼별 직전/최근 종가 표 조회 (행: previous, current / 열: 심볼, 실패 시 NaN)"""
+    # 1차: spark 엔드포인트 요청 한 번으로 전체 심볼 조회
+    try:
+        pairs = _fetch_spark_pairs(symbols)
+    except Exception:
+        pairs = {}
+
+    # 2차: spark에서 빠진 심볼만 yf.download 배치 요청으로
+    batch_symbols = [symbol for symbol in symbols if symbol not in pairs]
+    try:
+        batch = yf.download(
+            batch_symbols, period=RECENT_CLOSE_PERIOD, group_by='ticker',
+            threads=True, progress=False, auto_adjust=False
+        ) if batch_symbols else pd.DataFrame()
+    except Exception:
+        batch = pd.DataFrame()
+
+    for symbol in batch_symbols:
+        try:
+            # 배치 결과에서 심볼별 데이터 추출 (누락 시 KeyError)
+            pair = _last_two_closes(batch[symbol], min_closes=2)
+        except Exception:
+            pair = None
+        if pair is not None:
+            pairs[symbol] = pair
+
+    # 배치에서 빠진 심볼은 개별 요청을 병렬로 보내 가장 느린 응답만큼만 기다립니다
+    missing = [symbol for symbol in symbols if symbol not in pairs]
+    if missing:
+        retried = _parallel_by_symbol(_fetch_one, missing)
+        pairs.update({symbol: pair for symbol, pair in retried.items() if pair is not None})
+
+    return (
+        pd.DataFrame(pairs, index=['previous', 'current'])
+        .reindex(columns=symbols)
+        .astype(float)
+    )
+
+def _is_valid_market_snapshot(snapshot):
+    """디스크에서 읽은 (시장 데이터, 위험 신호) 스냅샷 검증"""
+    if not (isinstance(snapshot, tuple) and len(snapshot) == 2):
+        return False
+    data, risk = snapshot
+    if not (isinstance(data, dict) and data and isinstance(risk, dict)):
+        return False
+    return all(isinstance(x, dict) and 'updated_at' in x for x in data.values()) and 'score' in risk
+
+def _download_market_data():
+    """Yahoo Finance에서 시장 데이터 조회 (변화율/상태/표시값을 열 단위로 계산)"""
+    symbols = [info['symbol'] for info in TICKER_MAP.values()]
+    # (2, N) 종가 행렬: 0행 직전 종가, 1행 최근 종가
+    previous, current = _download_recent_closes(symbols).loc[['previous', 'current']].to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = np.where(previous != 0, (current - previous) / previous * 100.0, 0.0)
+
+    out = pd.DataFrame({
+        'id': list(TICKER_MAP),
+        'name': [info['name'] for info in TICKER_MAP.values()],
+        'ticker': [info['ticker'] for info in TICKER_MAP.values()],
+        'symbol': symbols,
+        'current_value': current,
+        'previous_value': previous,
+        'change_pct': change_pct,
+    })
+    out['unit'] = [info['unit'] for info in TICKER_MAP.values()]
+    out['status'] = np.where(
+        out['change_pct'].abs() < 1, '안정',
+        np.where(out['change_pct'] > 0, '상승', '하락')
+    )
+    out['formatted_value'] = [info['formatter'](value) for info, value in zip(TICKER_MAP.values(), current)]
+    out['positive_is_good'] = [info['positive_is_good'] for info in TICKER_MAP.values()]
+
+    # 조회에 실패한 심볼은 오류 행으로 표시
+    failed = out['current_value'].isna()
+    out.loc[failed, ['current_value', 'previous_value', 'change_pct']] = 0
+    out.loc[failed, 'status'] = "오류"
+    out.loc[failed, 'formatted_value'] = "N/A"
+    out.loc[failed, 'positive_is_good'] = True
+
+    # 상세 표용 변화율 문자열과 위험 방향별 상태 라벨
+    out['change_text'] = out['change_pct'].map('{:+.2f}%'.format)
+    direction = out['id'].map(RISK_INDICATORS).fillna('neutral').to_numpy()
+    is_up, is_down = direction == 'up', direction == 'down'
+    big_move = out['change_pct'].abs().to_numpy() > 1.5
+    rising_label = np.select([is_up, is_down], ['위험↑', '안전↑'], default=np.where(big_move, '위험↑', '변동↑'))
+    falling_label = np.select([is_up, is_down], ['안전↓', '위험↓'], default=np.where(big_move, '위험↓', '변동↓'))
+    status = out['status'].to_numpy()
+    out['risk_status'] = np.where(
+        status == '안정', '중립',
+        np.where(status == '상승', rising_label, falling_label)
+    )
+
+    # 상세 표 '업데이트' 열: 렌더링 시각이 아니라 데이터 조회 시각
+    out['updated_at'] = datetime.now().strftime('%H:%M:%S')
+
+    # 지표 id로 바로 찾을 수 있도록 {id: 행} 형태로 반환
+    return {row['id']: row for row in out.drop(columns='symbol').to_dict(orient='records')}
+
+@st.cache_resource(show_spinner=False)
+def _market_snapshot_store():
+    """프로세스 공유 시장 데이터 스냅샷 (백그라운드 갱신 스레드가 채움)"""
+    return {'snapshot': None, 'fetched_at': 0.0, 'lock': threading.Lock()}
+
+def _download_market_snapshot():
+    """시장 데이터를 받아 위험 신호까지 한 번에 계산 (스냅샷마다 한 번만 평가)"""
+    data = _download_market_data()
+    return data, compute_risk_signal(data)
+
+def _refresh_shared_snapshot(store, registry):
+    """Yahoo에서 시장 데이터를 다시 받아 공유 스냅샷과 디스크 캐시에 저장"""
+    # 갱신 스레드와 새로고침 버튼이 겹쳐도 Yahoo 요청은 한 번만
+    snapshot = _coalesce('market', _download_market_snapshot, registry)
+    with store['lock']:
+        store['snapshot'] = snapshot
+        store['fetched_at'] = time.time()
+    _save_disk_cache('market_snapshot', snapshot)
+    return snapshot
+
+def _cache_warmer_loop(stop_evt, store, registry):
+    """주기적으로 공유 스냅샷을 갱신해 요청 경로에서 Yahoo 대기를 없앰"""
+    while not stop_evt.is_set():
+        try:
+            _refresh_shared_snapshot(store, registry)
+        except Exception:
+            pass
+        stop_evt.wait(WARMER_INTERVAL_SEC)
+
+@st.cache_resource(show_spinner=False)
+def _start_warmer():
+    """백그라운드 갱신 스레드를 프로세스당 한 번만 시작"""
+    t = threading.Thread(
+        target=_cache_warmer_loop,
+        args=(threading.Event(), _market_snapshot_store(), _inflight_registry()),
+        name='market-cache-warmer',
+        daemon=True
+    )
+    t.start()
+    return t
+
+def refresh_market_data():
+    """공유 스냅샷을 즉시 갱신 (새로고침 버튼용), (시장 데이터, 위험 신호) 반환"""
+    data, risk = _refresh_shared_snapshot(_market_snapshot_store(), _inflight_registry())
+    return dict(data), risk
 
-def get_item(data, key):
-    for item in data:
-        if item['id'] == key:
-            return item
-    return None
+def fetch_market_data():
+    """(시장 데이터, 위험 신호) 가져오기 (1분 이내 공유 스냅샷 → 1분 이내 디스크 스냅샷 → 직접 조회 순)"""
+    store = _market_snapshot_store()
+    with store['lock']:
+        snapshot = store['snapshot']
+        fetched_at = store['fetched_at']
+    if snapshot is not None and time.time() - fetched_at > MARKET_SNAPSHOT_TTL_SEC:
+        # 갱신 스레드가 멈췄거나 조회가 걸려 있으면 오래된 가격을 내보내지 않음
+        snapshot = None
+    if snapshot is None:
+        # 서버 재시작 직후 갱신 스레드의 첫 조회가 끝나기 전
+        snapshot = _load_disk_cache('market_snapshot', ttl=MARKET_SNAPSHOT_TTL_SEC, validate=_is_valid_market_snapshot)
+    if snapshot is None:
+        return refresh_market_data()
+    data, risk = snapshot
+    return dict(data), risk
+
+def _field(key, field):
+    """지표 항목의 필드 값을 읽는 측정 함수 생성"""
+    def measure(idx):
+        item = idx.get(key)
+        return item[field] if item else None
+    return measure
+
+def _spx_ndx_divergence(idx):
+    """S&P 500과 나스닥 100 변화율의 괴리 (%p)"""
+    spx, ndx = idx.get('spx'), idx.get('ndx')
+    if not (spx and ndx):
+        return None
+    return abs(spx['change_pct'] - ndx['change_pct'])
+
+def _us10y_move(idx):
+    """미 10년물 금리의 전일 대비 변동폭 (p)"""
+    us10y = idx.get('us10y')
+    if not us10y or us10y['current_value'] is None or us10y['previous_value'] is None:
+        return None
+    return abs(us10y['current_value'] - us10y['previous_value'])
+
+# 위험 점수 규칙표: (측정 함수, 방향, 단계)
+# - 방향 'above'는 값 > 임계값, 'below'는 값 < 임계값일 때 단계 적용
+# - 단계 (임계값, 점수, 설명)는 강한 순서로 나열하며 처음 일치한 단계만 반영
+_RISK_RULES = (
+    # S&P 500 / 나스닥 100 하락
+    (_field('spx', 'change_pct'), 'below', (
+        (-3.0, 3, "S&P500 급락 ({v:+.2f}%)"),
+        (-1.5, 2, "S&P500 하락 ({v:+.2f}%)"),
+        (-0.5, 1, "S&P500 약세 ({v:+.2f}%)"),
+    )),
+    (_field('ndx', 'change_pct'), 'below', (
+        (-3.0, 3, "나스닥100 급락 ({v:+.2f}%)"),
+        (-1.5, 2, "나스닥100 하락 ({v:+.2f}%)"),
+        (-0.5, 1, "나스닥100 약세 ({v:+.2f}%)"),
+    )),
+    # 두 지수가 2% 이상 다르게 움직이면 시장 불안정
+    (_spx_ndx_divergence, 'above', (
+        (2.0, 2, "S&P-나스닥 디버전스 ({v:.2f}%p)"),
+        (1.0, 1, "지수 간 괴리 확대 ({v:.2f}%p)"),
+    )),
+    # VIX 수준
+    (_field('vix', 'current_value'), 'above', (
+        (35, 3, "VIX 매우 높음 ({v:.1f})"),
+        (25, 2, "VIX 높음 ({v:.1f})"),
+        (15, 1, "VIX 다소 높음 ({v:.1f})"),
+    )),
+    # 달러 지수 변화율과 절대 수준 (105 이상이면 강세)
+    (_field('dxy', 'change_pct'), 'above', (
+        (1.0, 2, "달러지수 급등 ({v:+.2f}%)"),
+        (0.5, 1, "달러지수 상승 ({v:+.2f}%)"),
+    )),
+    (_field('dxy', 'current_value'), 'above', (
+        (110, 2, "달러 매우 강세 ({v:.1f})"),
+        (105, 1, "달러 강세 ({v:.1f})"),
+    )),
+    # 원-달러 환율 (원화 약세/급등 모두 위험)
+    (_field('krwusd', 'change_pct'), 'above', (
+        (2.0, 3, "원화 급락 대비 달러 ({v:+.2f}%)"),
+        (1.0, 2, "원화 약세 대비 달러 ({v:+.2f}%)"),
+        (0.5, 1, "원화 하락 대비 달러 ({v:+.2f}%)"),
+    )),
+    (_field('krwusd', 'change_pct'), 'below', (
+        (-2.0, 2, "원화 급등 대비 달러 ({v:+.2f}%)"),
+        (-1.0, 1, "원화 강세 대비 달러 ({v:+.2f}%)"),
+    )),
+    # 달러-엔 환율 (캐리 트레이드 지표)
+    (_field('usdjpy', 'change_pct'), 'above', (
+        (2.0, 2, "엔화 급락 ({v:+.2f}%)"),
+        (1.0, 1, "엔화 약세 ({v:+.2f}%)"),
+    )),
+    (_field('usdjpy', 'change_pct'), 'below', (
+        (-2.0, 3, "엔화 급등, 캐리 청산 ({v:+.2f}%)"),
+        (-1.0, 2, "엔화 강세 ({v:+.2f}%)"),
+    )),
+    # 원-엔 급락은 원화의 구조적 약세 신호 (한국 특화)
+    (_field('krwjpy', 'change_pct'), 'below', (
+        (-2.0, 2, "원화 구조적 약세 ({v:+.2f}%)"),
+        (-1.0, 1, "원화 대비 엔화 강세 ({v:+.2f}%)"),
+    )),
+    # 미 10년물 금리 변동폭
+    (_us10y_move, 'above', (
+        (0.20, 2, "미10년물 급변 ({v:.2f}p)"),
+        (0.10, 1, "미10년물 변동 확대 ({v:.2f}p)"),
+    )),
+    # 안전자산 / 원자재 / 비트코인
+    (_field('gold', 'change_pct'), 'above', (
+        (2.0, 2, "금 강세 ({v:+.2f}%)"),
+        (1.0, 1, "금 상승 ({v:+.2f}%)"),
+    )),
+    (_field('silver', 'change_pct'), 'above', (
+        (3.0, 2, "은 강세 ({v:+.2f}%)"),
+        (1.5, 1, "은 상승 ({v:+.2f}%)"),
+    )),
+    # 구리 급등은 인플레이션/경기 과열, 급락은 경기 침체 우려 신호
+    (_field('copper', 'change_pct'), 'above', (
+        (3.0, 2, "구리 급등 (경기 과열/인플레) ({v:+.2f}%)"),
+        (1.5, 1, "구리 상승 ({v:+.2f}%)"),
+    )),
+    (_field('copper', 'change_pct'), 'below', (
+        (-3.0, 1, "구리 급락 (경기 침체 우려) ({v:+.2f}%)"),
+    )),
+    (_field('btc', 'change_pct'), 'above', (
+        (6.0, 2, "BTC 급등 ({v:+.2f}%)"),
+        (3.0, 1, "BTC 상승 ({v:+.2f}%)"),
+    )),
+)
+
+def _compile_rules(rules):
+    """규칙표를 (측정 함수들, 부호 벡터, 임계값 행렬, 점수 행렬, 설명) 형태로 변환
+
+    'below' 규칙은 값과 임계값의 부호를 뒤집어 'above'와 같은 방식으로 비교합니다.
+    각 행은 임계값 오름차순이며, 단계 수가 모자란 칸은 넘을 수 없는 +inf로 채웁니다.
+    """
+    n_tiers = max(len(tiers) for _, _, tiers in rules)
+    thresholds = np.full((len(rules), n_tiers), np.inf)
+    points = np.zeros((len(rules), n_tiers), dtype=int)
+    measures, signs, templates = [], [], []
+    for i, (measure, direction, tiers) in enumerate(rules):
+        sign = 1.0 if direction == 'above' else -1.0
+        ordered = sorted(tiers, key=lambda tier: sign * tier[0])
+        thresholds[i, :len(ordered)] = [sign * threshold for threshold, _, _ in ordered]
+        points[i, :len(ordered)] = [pts for _, pts, _ in ordered]
+        measures.append(measure)
+        signs.append(sign)
+        templates.append(tuple(template for _, _, template in ordered))
+    return tuple(measures), np.array(signs), thresholds, points, tuple(templates)
+
+_RISK_MEASURES, _RISK_SIGNS, _RISK_THRESHOLDS, _RISK_POINTS, _RISK_TEMPLATES = _compile_rules(_RISK_RULES)
 
 def compute_risk_signal(market_data):
-    """간단한 휴리스틱으로 위험 점수와 신호등 색상을 계산합니다."""
-    score = 0
-    factors = []
+    """간단한 휴리스틱으로 위험 점수와 신호등 색상을 계산합니다 (market_data: {id: 항목})."""
 
-    # S&P 500 분석 (기존 코드 유지)
-    spx = get_item(market_data, 'spx')
-    if spx:
-        spx_chg = spx['change_pct']
-        if spx_chg < -3.0:
-            score += 3; factors.append(f"S&P500 급락 ({spx_chg:+.2f}%) +3")
-        elif spx_chg < -1.5:
-            score += 2; factors.append(f"S&P500 하락 ({spx_chg:+.2f}%) +2")
-        elif spx_chg < -0.5:
-            score += 1; factors.append(f"S&P500 약세 ({spx_chg:+.2f}%) +1")
-
-    # 나스닥 100 분석 추가
-    ndx = get_item(market_data, 'ndx')
-    if ndx:
-        ndx_chg = ndx['change_pct']
-        if ndx_chg < -3.0:
-            score += 3; factors.append(f"나스닥100 급락 ({ndx_chg:+.2f}%) +3")
-        elif ndx_chg < -1.5:
-            score += 2; factors.append(f"나스닥100 하락 ({ndx_chg:+.2f}%) +2")
-        elif ndx_chg < -0.5:
-            score += 1; factors.append(f"나스닥100 약세 ({ndx_chg:+.2f}%) +1")
-    
-    # S&P 500과 나스닥 100의 디버전스 체크 (추가 분석)
-    if spx and ndx:
-        spx_chg = spx['change_pct']
-        ndx_chg = ndx['change_pct']
-        divergence = abs(spx_chg - ndx_chg)
-        
-        # 두 지수가 2% 이상 다르게 움직이면 시장 불안정
-        if divergence > 2.0:
-            score += 2; factors.append(f"S&P-나스닥 디버전스 ({divergence:.2f}%p) +2")
-        elif divergence > 1.0:
-            score += 1; factors.append(f"지수 간 괴리 확대 ({divergence:.2f}%p) +1")
-
-    # VIX 분석
-    vix = get_item(market_data, 'vix')
-    if vix and vix['current_value']:
-        vix_level = vix['current_value']
-        if vix_level > 35:
-            score += 3; factors.append(f"VIX 매우 높음 ({vix_level:.1f}) +3")
-        elif vix_level > 25:
-            score += 2; factors.append(f"VIX 높음 ({vix_level:.1f}) +2")
-        elif vix_level > 15:
-            score += 1; factors.append(f"VIX 다소 높음 ({vix_level:.1f}) +1")
-
-    # 달러 지수 분석
-    dxy = get_item(market_data, 'dxy')
-    if dxy:
-        dxy_chg = dxy['change_pct']
-        dxy_level = dxy['current_value']
-        
-        if dxy_chg > 1.0:
-            score += 2; factors.append(f"달러지수 급등 ({dxy_chg:+.2f}%) +2")
-        elif dxy_chg > 0.5:
-            score += 1; factors.append(f"달러지수 상승 ({dxy_chg:+.2f}%) +1")
-        
-        # 달러지수 절대 수준도 고려 (105 이상이면 강세)
-        if dxy_level > 110:
-            score += 2; factors.append(f"달러 매우 강세 ({dxy_level:.1f}) +2")
-        elif dxy_level > 105:
-            score += 1; factors.append(f"달러 강세 ({dxy_level:.1f}) +1")
+    # 모든 규칙의 측정값을 한 벡터로 모아 (규칙 × 단계) 임계값 행렬과 한 번에 비교
+    values = np.array(
+        [np.nan if value is None else value for value in (measure(market_data) for measure in _RISK_MEASURES)],
+        dtype=float
+    )
+    # 규칙별로 넘어선 단계 수 (측정값이 없으면 NaN 비교라 0)
+    passed = (_RISK_THRESHOLDS < (_RISK_SIGNS * values)[:, None]).sum(axis=1)
+    rules = np.flatnonzero(passed)
+    tiers = passed[rules] - 1
+    hit_points = _RISK_POINTS[rules, tiers]
+    score = int(hit_points.sum())
+    factors = [
+        f"{_RISK_TEMPLATES[rule][tier].format(v=values[rule])} +{pts}"
+        for rule, tier, pts in zip(rules, tiers, hit_points)
+    ]
 
     # 크로스 환율 분석: 달러 강세 시 원화 vs 엔화 약세 비교
-    krwusd = get_item(market_data, 'krwusd')
-    usdjpy = get_item(market_data, 'usdjpy')
-    krwjpy = get_item(market_data, 'krwjpy')
-    if dxy and krwusd and usdjpy and krwjpy:
+    dxy = market_data.get('dxy')
+    krwjpy = market_data.get('krwjpy')
+    if dxy and market_data.get('krwusd') and market_data.get('usdjpy') and krwjpy:
         dxy_chg = dxy['change_pct']
-        krwusd_chg = krwusd['change_pct']
-        usdjpy_chg = usdjpy['change_pct']
         krwjpy_chg = krwjpy['change_pct']
         
         # 달러 강세 시 원화가 엔화보다 더 약세인 경우 (원-엔 하락)
@@ -263,88 +659,6 @@ def compute_risk_signal(market_data):
         if dxy_chg < -0.5 and krwjpy_chg < -1.0:
             score += 1; factors.append(f"달러 약세에도 원화 부진 ({krwjpy_chg:+.2f}%) +1")
 
-    # 원-달러 환율 분석
-    if krwusd:
-        krwusd_chg = krwusd['change_pct']
-        if krwusd_chg > 2.0:
-            score += 3; factors.append(f"원화 급락 대비 달러 ({krwusd_chg:+.2f}%) +3")
-        elif krwusd_chg > 1.0:
-            score += 2; factors.append(f"원화 약세 대비 달러 ({krwusd_chg:+.2f}%) +2")
-        elif krwusd_chg > 0.5:
-            score += 1; factors.append(f"원화 하락 대비 달러 ({krwusd_chg:+.2f}%) +1")
-        elif krwusd_chg < -2.0:
-            score += 2; factors.append(f"원화 급등 대비 달러 ({krwusd_chg:+.2f}%) +2")
-        elif krwusd_chg < -1.0:
-            score += 1; factors.append(f"원화 강세 대비 달러 ({krwusd_chg:+.2f}%) +1")
-
-    # 달러-엔 환율 분석 (캐리 트레이드 지표)
-    if usdjpy:
-        usdjpy_chg = usdjpy['change_pct']
-        if usdjpy_chg > 2.0:
-            score += 2; factors.append(f"엔화 급락 ({usdjpy_chg:+.2f}%) +2")
-        elif usdjpy_chg > 1.0:
-            score += 1; factors.append(f"엔화 약세 ({usdjpy_chg:+.2f}%) +1")
-        elif usdjpy_chg < -2.0:
-            score += 3; factors.append(f"엔화 급등, 캐리 청산 ({usdjpy_chg:+.2f}%) +3")
-        elif usdjpy_chg < -1.0:
-            score += 2; factors.append(f"엔화 강세 ({usdjpy_chg:+.2f}%) +2")
-
-    # 원-엔 환율 단독 분석 (한국 특화)
-    if krwjpy:
-        krwjpy_chg = krwjpy['change_pct']
-        # 원-엔 급락은 원화의 구조적 약세 신호
-        if krwjpy_chg < -2.0:
-            score += 2; factors.append(f"원화 구조적 약세 ({krwjpy_chg:+.2f}%) +2")
-        elif krwjpy_chg < -1.0:
-            score += 1; factors.append(f"원화 대비 엔화 강세 ({krwjpy_chg:+.2f}%) +1")
-
-    # 나머지 지표들...
-    us10y = get_item(market_data, 'us10y')
-    if us10y and us10y['current_value'] is not None and us10y['previous_value'] is not None:
-        move_bp = abs(us10y['current_value'] - us10y['previous_value'])
-        if move_bp > 0.20:
-            score += 2; factors.append(f"미10년물 급변 ({move_bp:.2f}p) +2")
-        elif move_bp > 0.10:
-            score += 1; factors.append(f"미10년물 변동 확대 ({move_bp:.2f}p) +1")
-
-    gold = get_item(market_data, 'gold')
-    if gold:
-        gchg = gold['change_pct']
-        if gchg > 2.0:
-            score += 2; factors.append(f"금 강세 ({gchg:+.2f}%) +2")
-        elif gchg > 1.0:
-            score += 1; factors.append(f"금 상승 ({gchg:+.2f}%) +1")
-
-    silver = get_item(market_data, 'silver')
-    if silver:
-        schg = silver['change_pct']
-        if schg > 3.0:
-            score += 2; factors.append(f"은 강세 ({schg:+.2f}%) +2")
-        elif schg > 1.5:
-            score += 1; factors.append(f"은 상승 ({schg:+.2f}%) +1")
-            
-    # 구리(Copper) 분석 추가 (경기 선행 지표)
-    copper = get_item(market_data, 'copper')
-    if copper:
-        cchg = copper['change_pct']
-        # 급격한 상승은 인플레이션 압력 또는 경기 과열 신호로 위험 점수 가산
-        if cchg > 3.0:
-            score += 2; factors.append(f"구리 급등 (경기 과열/인플레) ({cchg:+.2f}%) +2")
-        elif cchg > 1.5:
-            score += 1; factors.append(f"구리 상승 ({cchg:+.2f}%) +1")
-        # 급격한 하락은 경기 침체 우려 신호로 위험 점수 가산
-        elif cchg < -3.0:
-            score += 1; factors.append(f"구리 급락 (경기 침체 우려) ({cchg:+.2f}%) +1")
-
-
-    btc = get_item(market_data, 'btc')
-    if btc:
-        bchg = btc['change_pct']
-        if bchg > 6.0:
-            score += 2; factors.append(f"BTC 급등 ({bchg:+.2f}%) +2")
-        elif bchg > 3.0:
-            score += 1; factors.append(f"BTC 상승 ({bchg:+.2f}%) +1")
-
     # 점수 → 신호등
     if score >= 6:
         level = '높음'
@@ -363,12 +677,12 @@ def compute_risk_signal(market_data):
 
 
 def calculate_pair_trading_signals(market_data):
-    """페어 트레이딩 신호 계산 (5단계)"""
+    """페어 트레이딩 신호 계산 (5단계, market_data: {id: 항목})"""
     signals = {}
     
     # 1. 금-은 페어 트레이딩
-    gold = get_item(market_data, 'gold')
-    silver = get_item(market_data, 'silver')
+    gold = market_data.get('gold')
+    silver = market_data.get('silver')
     
     if gold and silver:
         gold_value = gold['current_value']
@@ -413,7 +727,7 @@ def calculate_pair_trading_signals(market_data):
         }
     
     # 2. VIX 기반 채권-주식 페어 트레이딩
-    vix = get_item(market_data, 'vix')
+    vix = market_data.get('vix')
     
     if vix:
         vix_level = vix['current_value']
@@ -455,7 +769,7 @@ def calculate_pair_trading_signals(market_data):
         }
     
     # 3. 달러-엔 캐리 트레이드
-    usdjpy = get_item(market_data, 'usdjpy')
+    usdjpy = market_data.get('usdjpy')
     
     if usdjpy:
         usdjpy_value = usdjpy['current_value']
@@ -497,8 +811,8 @@ def calculate_pair_trading_signals(market_data):
         }
     
     # 4. S&P 500 - 나스닥 100 페어 트레이딩
-    spx = get_item(market_data, 'spx')
-    ndx = get_item(market_data, 'ndx')
+    spx = market_data.get('spx')
+    ndx = market_data.get('ndx')
     
     if spx and ndx:
         spx_chg = spx['change_pct']
@@ -545,33 +859,291 @@ def calculate_pair_trading_signals(market_data):
     return signals
 
 
-def main():
-    # 헤더
-    st.markdown('<h1 class="main-header">📊 Financial Indices Dashboard</h1>', unsafe_allow_html=True)
-    
-    # 사이드바
-    with st.sidebar:
-        st.header("⚙️ 설정")
-        if st.button("🔄 데이터 새로고침"):
-            # 데이터 새로고침 시작 시간 기록
-            st.session_state['refresh_started_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            st.cache_data.clear()
-            st.rerun()
-        # 단일 차트 시작일 선택
-        default_start = (datetime.now() - timedelta(days=365*2)).date()
-        single_chart_start = st.date_input("단일 차트 시작일", value=default_start)
-    
-    # 데이터 가져오기
+def _close_series(hist):
+    """가격 이력에서 결측을 뺀 종가 시리즈 추출 (데이터가 없으면 None)"""
+    if hist is None or hist.empty or 'Close' not in hist.columns:
+        return None
+    # 종가만 남기고 바로 float32로 (차트/기준화 계산에는 충분한 정밀도)
+    closes = hist['Close'].dropna().astype('float32')
+    if closes.empty:
+        return None
+    # 개별 조회(시간대 포함)와 배치 조회(시간대 없음) 결과를 같은 축에 맞춤
+    if getattr(closes.index, 'tz', None) is not None:
+        closes.index = closes.index.tz_localize(None)
+    return closes
+
+def _download_history(symbol, years=None, start=None):
+    """단일 심볼 종가 이력 개별 조회 (배치 요청에서 누락된 심볼의 대체 경로)"""
+    try:
+        # 스레드 간 공유 상태가 없도록 호출마다 새로 만듦 (HTTP 세션은 yfinance가 공유)
+        ticker = yf.Ticker(symbol)
+        if start is not None:
+            df = _yahoo_history(ticker, start=start)
+        else:
+            df = _yahoo_history(ticker, period=f"{years}y")
+            if df is None or df.empty:
+                # period가 실패하면 수동 기간으로 재시도 (여유를 두기 위해 +30일)
+                df = _yahoo_history(ticker, start=datetime.now() - timedelta(days=365*years+30))
+    except Exception:
+        df = None
+    return _close_series(df)
+
+def _compact_for_plot(series):
+    """차트 전송용 시리즈 축소 (float32, 점 개수 상한)"""
+    # 고정 소수 자리 반올림은 KRWJPY(약 0.1) 같은 작은 값을 계단 모양으로 만들므로 하지 않음
+    series = series.astype('float32', copy=False)
+    if len(series) > _MAX_POINTS_PER_TRACE:
+        step = -(-len(series) // _MAX_POINTS_PER_TRACE)
+        # 마지막 점(최신 값)은 항상 유지
+        series = pd.concat([series.iloc[:-1:step], series.iloc[-1:]])
+    return series
+
+def _lttb_indices(y, n_out):
+    """LTTB(Largest-Triangle-Three-Buckets)로 남길 점의 위치 인덱스 계산"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float)
+    # 첫/마지막 점은 고정하고 나머지를 n_out-2개 구간으로 나눔
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # 다음 구간의 평균점 (마지막 구간 다음은 끝점)
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:nhi].mean(), y[hi:nhi].mean()
+        # 직전 선택점-후보점-다음 평균점 삼각형 넓이가 가장 큰 후보 선택
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_bulk_history(symbols, years=None, start=None):
+    """여러 심볼의 종가 이력을 한 번의 배치 요청으로 조회 ({심볼: 종가 시리즈})"""
+    # 서버 재시작 직후에도 TTL 이내 이력은 디스크에서 바로 복원
+    # (고정 기간만 저장: 시작일별로 저장하면 날짜를 바꿀 때마다 파일이 계속 쌓임)
+    cache_name = f"history_{years}y" if start is None else None
+    cached = _load_parquet_cache(cache_name, ttl=600) if cache_name else None
+    cached_result = {}
+    if cached is not None:
+        for symbol in cached.columns.intersection(list(symbols)):
+            closes = cached[symbol].dropna()
+            if not closes.empty:
+                cached_result[symbol] = closes
+    # 캐시에 없는 심볼(이전 조회에서 실패한 심볼 포함)만 새로 조회
+    to_fetch = [symbol for symbol in symbols if symbol not in cached_result]
+    if not to_fetch:
+        return cached_result
+
+    window = {'start': start} if start is not None else {'period': f"{years}y"}
+    # 'Close' 층만 꺼내 (날짜 × 심볼) 종가 표로 사용
+    try:
+        wide = yf.download(
+            to_fetch, group_by='column', threads=True, progress=False, **window
+        )['Close'].astype('float32')
+    except Exception:
+        wide = pd.DataFrame()
+
+    result = {}
+    for symbol in wide.columns.intersection(to_fetch):
+        closes = wide[symbol].dropna()
+        if not closes.empty:
+            result[symbol] = closes
+
+    # 배치에서 빠진 심볼만 개별 요청으로 병렬 재시도
+    missing = [symbol for symbol in to_fetch if symbol not in result]
+    if missing:
+        retried = _parallel_by_symbol(
+            lambda symbol: _download_history(symbol, years, start), missing
+        )
+        result.update({symbol: closes for symbol, closes in retried.items() if closes is not None})
+    result = {symbol: _compact_for_plot(closes) for symbol, closes in result.items()}
+    # 재조회가 모두 실패해도 캐시에서 복원한 이력은 그대로 반환
+    merged = {**cached_result, **result}
+    if result and cache_name:
+        # 심볼별 시리즈를 (날짜 × 심볼) 표 하나로 저장 (읽을 때 열별 결측 제거로 복원)
+        _save_parquet_cache(cache_name, pd.DataFrame(merged))
+    return merged
+
+def fetch_history_window(years=None, start=None):
+    """모든 지수의 기간별 종가 이력 ({심볼: 종가 시리즈})
+
+    시작 시점이 기본 조회 기간(5년) 안이면 캐시된 5년 이력을 잘라 쓰고,
+    더 이전이면 해당 기간만 따로 조회합니다.
+    """
+    symbols = tuple(info['symbol'] for info in TICKER_MAP.values())
+    today = pd.Timestamp.now().normalize()
+    cutoff = pd.Timestamp(start) if start is not None else today - pd.DateOffset(years=years)
+    if cutoff < today - pd.DateOffset(years=HISTORY_BASE_YEARS):
+        return fetch_bulk_history(symbols, years=years, start=start)
+
+    base = fetch_bulk_history(symbols, years=HISTORY_BASE_YEARS)
+    sliced = {symbol: closes.loc[cutoff:] for symbol, closes in base.items()}
+    return {symbol: closes for symbol, closes in sliced.items() if not closes.empty}
+
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_all_history_rebased_from(start_date):
+    """모든 지수의 기준=100 종가 시리즈 조회 ({키: {name, ticker, series}})"""
+    closes_map = fetch_history_window(start=start_date)
+    if not closes_map:
+        return {}
+
+    # (날짜 × 심볼) 종가 표 전체를 각 심볼의 첫 유효 종가로 한 번에 나눔
+    closes = pd.DataFrame(closes_map)
+    base = closes.bfill().iloc[0]
+    rebased = closes.divide(base.where(base != 0)).mul(100.0)
+
+    result = {}
+    for key, info in TICKER_MAP.items():
+        if info['symbol'] not in rebased:
+            continue
+        series = rebased[info['symbol']].dropna()
+        if len(series) > _REBASED_MAX_POINTS:
+            series = series.iloc[_lttb_indices(series.to_numpy(), _REBASED_MAX_POINTS)]
+        if not series.empty:
+            result[key] = {
+                'name': info['name'],
+                'ticker': info['ticker'],
+                'series': _compact_for_plot(series)
+            }
+    return result
+
+@st.cache_data(ttl=600, show_spinner=False)
+def build_history_figure(years):
+    """기간별 과거 차트 figure와 데이터 없는 지수 목록 생성 (심볼별 서브플롯 하나로 묶음)"""
+    closes_map = fetch_history_window(years=years)
+    missing = [
+        f"{info['name']} ({info['ticker']})"
+        for info in TICKER_MAP.values() if info['symbol'] not in closes_map
+    ]
+
+    n_cols = 2
+    n_rows = -(-len(TICKER_MAP) // n_cols)
+    fig = make_subplots(
+        rows=n_rows, cols=n_cols,
+        subplot_titles=[f"{info['name']} ({info['ticker']}) - {years}년" for info in TICKER_MAP.values()],
+        vertical_spacing=0.06
+    )
+    for i, info in enumerate(TICKER_MAP.values()):
+        closes = closes_map.get(info['symbol'])
+        if closes is None:
+            continue
+        row, col = i // n_cols + 1, i % n_cols + 1
+        fig.add_trace(
+            go.Scatter(x=closes.index, y=closes.values, mode='lines', name=info['name']),
+            row=row, col=col
+        )
+        if info['symbol'] == '^TNX':
+            fig.update_yaxes(title_text='Yield (%)', row=row, col=col)
+    fig.update_layout(height=300 * n_rows, showlegend=False, margin=dict(l=10, r=10, t=40, b=10))
+    return fig, missing
+
+@st.cache_data(ttl=600, show_spinner=False)
+def build_rebased_figure(start_date):
+    """기준=100 단일 차트의 figure 명세(dict) 생성 (하이라이트 스타일은 호출 측에서 적용)"""
+    all_hist = fetch_all_history_rebased_from(start_date)
+    if not all_hist:
+        return None
+
+    # 모든 시리즈를 긴 형식 표 하나로 합쳐 한 번에 trace 생성 (날짜 범위가 달라도 됨)
+    long_df = pd.concat(
+        [
+            item['series'].rename_axis('Date').reset_index(name='value').assign(name=item['name'])
+            for item in all_hist.values()
+        ],
+        ignore_index=True
+    )
+    fig_all = px.line(long_df, x='Date', y='value', color='name')
+    fig_all.update_traces(
+        line=dict(width=2),
+        hovertemplate='<b>%{fullData.name}</b><br>' +
+                      '날짜: %{x|%Y-%m-%d}<br>' +
+                      '지수: %{y:.2f}<br>' +
+                      '<extra></extra>'
+    )
+
+    fig_all.update_layout(
+        height=420,
+        margin=dict(l=10, r=10, t=30, b=10),
+        xaxis_title=None,
+        yaxis_title='Rebased (Start=100)',
+        legend_title_text='지수',
+        # 크로스헤어 활성화
+        hovermode='x unified',  # x축 기준으로 모든 시리즈의 값 표시
+        hoverdistance=100,
+        spikedistance=1000,
+        # 세로선 추가
+        xaxis=dict(
+            showspikes=True,  # 세로선 활성화
+            spikemode='across',  # 차트 전체를 가로지름
+            spikesnap='cursor',  # 커서 위치에 정확히 표시
+            spikecolor='rgba(255, 255, 0, 0.8)',  # 선 색상
+            spikethickness=1,  # 선 두께
+            spikedash='dot'  # 점선 스타일
+        ),
+        # 가로선 추가
+        yaxis=dict(
+            showspikes=True,  # 가로선 활성화
+            spikemode='across',
+            spikesnap='cursor',
+            spikecolor='rgba(255, 255, 25, 0.5)',
+            spikethickness=1,
+            spikedash='dot'
+        )
+    )
+    # Figure 객체 대신 평범한 dict로 캐시 (재실행마다 Figure 재생성/검증 없이 바로 수정 가능)
+    return fig_all.to_dict()
+
+def detail_table_styles(df):
+    """상세 표 전체의 셀 스타일 표를 한 번에 계산 (상태/변화율 열만 채움)"""
+    styles = pd.DataFrame('', index=df.index, columns=df.columns)
+    statuses = df['상태'].to_numpy()
+    styles['상태'] = np.select(
+        [np.isin(statuses, _DANGER_STATUSES), np.isin(statuses, _SAFE_STATUSES)],
+        [_DANGER_STYLE, _SAFE_STYLE],
+        default=_NEUTRAL_STYLE
+    )
+    change = df['변화율'].astype(str)
+    styles.loc[change.str.startswith('+'), '변화율'] = _RISE_TEXT_STYLE
+    styles.loc[change.str.startswith('-'), '변화율'] = _FALL_TEXT_STYLE
+    return styles
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def render_detail_table_html(rows):
+    """상세 데이터 표 HTML 생성 (같은 스냅샷이면 Styler 렌더링을 다시 하지 않음)"""
+    df = pd.DataFrame(list(rows), columns=['지수명', '심볼', '현재가', '변화율', '상태', '업데이트'])
+    return (
+        df.style
+        .apply(detail_table_styles, axis=None)
+        .hide(axis='index')
+        .set_table_attributes('style="width: 100%"')
+        .to_html()
+    )
+
+
+@st.fragment
+def live_market_section():
+    """신호등/지수 현황/상세 표/페어 트레이딩 영역 (새로고침 버튼은 차트를 건드리지 않고 이 영역만 다시 실행)"""
+    refresh_clicked = st.button("🔄 데이터 새로고침")
+    if refresh_clicked:
+        # 데이터 새로고침 시작 시간 기록
+        st.session_state['refresh_started_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
     with st.spinner("시장 데이터를 가져오는 중..."):
         t0 = time.perf_counter()
-        market_data = fetch_market_data()
+        if refresh_clicked:
+            market_data, risk = refresh_market_data()
+        else:
+            market_data, risk = fetch_market_data()
         t1 = time.perf_counter()
         # 데이터 로드 완료 시간 기록
         st.session_state['refresh_finished_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         st.session_state['refresh_elapsed_sec'] = round(t1 - t0, 2)
     
-    # 신호등 계산 및 표시
-    risk = compute_risk_signal(market_data)
+    # 신호등 표시 (위험 신호는 스냅샷과 함께 계산됨)
     st.subheader("🚨 미국 내전 발발 가능성 신호등")
     st.markdown(
         f"""
@@ -592,9 +1164,10 @@ def main():
     st.subheader("📈 실시간 지수 현황")
     
     # 상태별 통계
-    stable_count = sum(1 for item in market_data if item['status'] == '안정')
-    rising_count = sum(1 for item in market_data if item['status'] == '상승')
-    falling_count = sum(1 for item in market_data if item['status'] == '하락')
+    status_counts = Counter(item['status'] for item in market_data.values())
+    stable_count = status_counts.get('안정', 0)
+    rising_count = status_counts.get('상승', 0)
+    falling_count = status_counts.get('하락', 0)
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -612,104 +1185,13 @@ def main():
     # 메인 데이터 테이블
     st.subheader("📊 상세 데이터")
 
-    # 각 지수별 위험 신호 방향 정의
-    RISK_INDICATORS = {
-        'gold': 'up',      # 금 상승 = 위험 증가
-        'silver': 'up',    # 은 상승 = 위험 증가
-        'copper': 'up',    # 구리 상승 = 위험 증가 (경기 과열/인플레)
-        'dxy': 'up',       # 달러지수 상승 = 위험 증가
-        'us10y': 'up',     # 채권 금리 상승 = 위험 증가
-        'btc': 'up',       # 비트코인 상승 = 위험 증가
-        'krwjpy': 'down',  # 원-엔 하락 = 원화 약세 = 위험 증가
-        'krwusd': 'up',    # 원-달러 상승 = 원화 약세 = 위험 증가
-        'usdjpy': 'both',  # 달러-엔은 급변동 자체가 위험
-        'vix': 'up',       # VIX 상승 = 위험 증가
-        'spx': 'down',     # S&P500 하락 = 위험 증가
-        'ndx': 'down',     # 나스닥100 하락 = 위험 증가
-    }
-
-    # 데이터프레임 생성
-    df_data = []
-    for item in market_data:
-        risk_direction = RISK_INDICATORS.get(item['id'], 'neutral')
-        
-        # 위험도에 따른 상태 결정
-        if item['status'] == '안정':
-            risk_status = '중립'
-            risk_color = 'neutral'
-        elif item['status'] == '상승':
-            if risk_direction == 'up':
-                risk_status = '위험↑'
-                risk_color = 'danger'
-            elif risk_direction == 'down':
-                risk_status = '안전↑'
-                risk_color = 'safe'
-            else:  # both
-                if abs(item['change_pct']) > 1.5:
-                    risk_status = '위험↑'
-                    risk_color = 'danger'
-                else:
-                    risk_status = '변동↑'
-                    risk_color = 'neutral'
-        else:  # 하락
-            if risk_direction == 'up':
-                risk_status = '안전↓'
-                risk_color = 'safe'
-            elif risk_direction == 'down':
-                risk_status = '위험↓'
-                risk_color = 'danger'
-            else:  # both
-                if abs(item['change_pct']) > 1.5:
-                    risk_status = '위험↓'
-                    risk_color = 'danger'
-                else:
-                    risk_status = '변동↓'
-                    risk_color = 'neutral'
-        
-        df_data.append({
-            '지수명': item['name'],
-            '심볼': item['ticker'],
-            '현재가': item['formatted_value'],
-            '변화율': f"{item['change_pct']:+.2f}%",
-            '상태': risk_status,
-            '_상태색상': risk_color,  # 숨겨진 컬럼
-            '업데이트': datetime.now().strftime('%H:%M:%S')
-        })
-
-    df = pd.DataFrame(df_data)
-
-    # 상태 색상 매핑 딕셔너리 생성
-    status_color_map = dict(zip(df['상태'], df['_상태색상']))
-
-    # 테이블 스타일링 함수
-    def style_status_cell(val):
-        """상태 셀 스타일링"""
-        color = status_color_map.get(val, 'neutral')
-        if color == 'danger':
-            return 'background-color: #dc3545; color: white; font-weight: bold'
-        elif color == 'safe':
-            return 'background-color: #007bff; color: white; font-weight: bold'
-        else:  # neutral
-            return 'background-color: #6c757d; color: white'
-
-    def style_change_cell(val):
-        """변화율 셀 스타일링"""
-        if isinstance(val, str):
-            if val.startswith('+'):
-                return 'color: #28a745; font-weight: bold'
-            elif val.startswith('-'):
-                return 'color: #dc3545; font-weight: bold'
-        return ''
-
-    # 숨겨진 컬럼 제거하고 스타일 적용
-    display_df = df.drop('_상태색상', axis=1)
-    styled_df = display_df.style.applymap(
-        style_status_cell, subset=['상태']
-    ).applymap(
-        style_change_cell, subset=['변화율']
+    # 표 행은 스냅샷 값만으로 구성 (값이 같으면 캐시된 HTML 재사용)
+    rows = tuple(
+        (item['name'], item['ticker'], item['formatted_value'],
+         item['change_text'], item['risk_status'], item['updated_at'])
+        for item in market_data.values()
     )
-
-    st.dataframe(styled_df, use_container_width=True, hide_index=True)
+    st.markdown(render_detail_table_html(rows), unsafe_allow_html=True)
 
     # 범례 추가
     st.caption("""
@@ -718,159 +1200,6 @@ def main():
     ⚪ **회색 (중립)** = 안정 또는 영향 미미
     """)
 
-
-    # 과거 차트 섹션
-    st.divider()
-    st.subheader("📉 과거 차트 (5년 / 3년)")
-
-    @st.cache_data(ttl=1200)
-    def fetch_history(symbol: str, years: int) -> pd.DataFrame:
-        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        # 여유를 두기 위해 +30일
-        start = start.replace(year=start.year)  # no-op; keep explicit
-        try:
-            df = yf.Ticker(symbol).history(period=f"{years}y")
-            if df is None or df.empty:
-                # period가 실패하면 수동 기간으로 재시도
-                from datetime import timedelta
-                df = yf.Ticker(symbol).history(start=datetime.now() - timedelta(days=365*years+30))
-        except Exception:
-            df = pd.DataFrame()
-        return df
-
-    def render_history_tab(years: int):
-        # 모든 심볼의 히스토리를 먼저 가져온 뒤 그립니다 (로딩 에러 방지)
-        with st.spinner(f"{years}년 데이터 불러오는 중..."):
-            history_map = {}
-            for key, info in TICKER_MAP.items():
-                history_map[key] = fetch_history(info['symbol'], years)
-        cols = st.columns(2)
-        idx = 0
-        for key, info in TICKER_MAP.items():
-            hist_df = history_map.get(key)
-            with cols[idx % 2]:
-                if hist_df is None or hist_df.empty or 'Close' not in getattr(hist_df, 'columns', []):
-                    st.warning(f"{info['name']} ({info['ticker']}) 데이터 없음")
-                else:
-                    import plotly.express as px
-                    fig = px.line(
-                        hist_df.reset_index(), x='Date', y='Close',
-                        title=f"{info['name']} ({info['ticker']}) - {years}년"
-                    )
-                    fig.update_layout(height=300, margin=dict(l=10, r=10, t=40, b=10))
-                    if info['symbol'] == '^TNX':
-                        fig.update_yaxes(title_text='Yield (%)')
-                    st.plotly_chart(fig, use_container_width=True)
-            idx += 1
-
-    tab5, tab3 = st.tabs(["5년", "3년"])
-    with tab5:
-        render_history_tab(5)
-    with tab3:
-        render_history_tab(3)
-
-    
-    
-    # 하단 정보
-    st.divider()
-    # 전체 지수 합산 차트 (사용자 지정 시작일, 기준=100)
-    st.subheader("🧩 모든 모니터링 지수: 단일 차트 (기준=100)")
-
-    @st.cache_data(ttl=600)
-    def fetch_all_history_rebased_from(start_date):
-        result = {}
-        for key, info in TICKER_MAP.items():
-            try:
-                h = yf.Ticker(info['symbol']).history(start=start_date)
-                if h is None or h.empty or 'Close' not in h.columns:
-                    continue
-                base = h['Close'].iloc[0]
-                if base and base != 0:
-                    rebased = (h['Close'] / base) * 100.0
-                    result[key] = {
-                        'name': info['name'],
-                        'ticker': info['ticker'],
-                        'series': rebased
-                    }
-            except Exception:
-                continue
-        return result
-
-    with st.spinner("모든 지수 히스토리 로딩 중..."):
-        all_hist = fetch_all_history_rebased_from(single_chart_start)
-
-    if not all_hist:
-        st.warning("모든 지수 히스토리를 불러오지 못했습니다.")
-    else:
-        import plotly.graph_objects as go
-        # 하이라이트 선택 컨트롤
-        highlight_options = [v['name'] for v in all_hist.values()]
-        selected_highlights = st.multiselect(
-            "하이라이트 지수 선택 (선택 시 나머지는 회색 처리)", 
-            options=highlight_options, 
-            default=[]
-        )
-
-        fig_all = go.Figure()
-        
-        # 날짜 범위가 서로 다를 수 있으므로 각 시리즈 자체 x를 사용해 trace 추가
-        for key, item in all_hist.items():
-            s = item['series']
-            is_dimmed = len(selected_highlights) > 0 and item['name'] not in selected_highlights
-            fig_all.add_trace(
-                go.Scatter(
-                    x=s.index,
-                    y=s.values,
-                    mode='lines',
-                    name=item['name'],
-                    line=dict(
-                        color='#cccccc' if is_dimmed else None, 
-                        width=1 if is_dimmed else 2
-                    ),
-                    opacity=0.3 if is_dimmed else 1.0,
-                    hovertemplate='<b>%{fullData.name}</b><br>' +
-                                  '날짜: %{x|%Y-%m-%d}<br>' +
-                                  '지수: %{y:.2f}<br>' +
-                                  '<extra></extra>'
-                )
-            )
-        
-        fig_all.update_layout(
-            height=420,
-            margin=dict(l=10, r=10, t=30, b=10),
-            yaxis_title='Rebased (Start=100)',
-            legend_title_text='지수',
-            # 크로스헤어 활성화
-            hovermode='x unified',  # x축 기준으로 모든 시리즈의 값 표시
-            hoverdistance=100,
-            spikedistance=1000,
-            # 세로선 추가
-            xaxis=dict(
-                showspikes=True,  # 세로선 활성화
-                spikemode='across',  # 차트 전체를 가로지름
-                spikesnap='cursor',  # 커서 위치에 정확히 표시
-                spikecolor='rgba(255, 255, 0, 0.8)',  # 선 색상
-                spikethickness=1,  # 선 두께
-                spikedash='dot'  # 점선 스타일
-            ),
-            # 가로선 추가
-            yaxis=dict(
-                showspikes=True,  # 가로선 활성화
-                spikemode='across',
-                spikesnap='cursor',
-                spikecolor='rgba(255, 255, 25, 0.5)',
-                spikethickness=1,
-                spikedash='dot'
-            )
-        )
-        
-        st.plotly_chart(fig_all, use_container_width=True)
-        
-        # 사용 팁 추가
-        st.info("💡 **사용 팁**: 차트 위에 마우스를 올리면 세로선/가로선이 표시되며, 모든 지수의 해당 시점 값을 동시에 확인할 수 있습니다.")
-
-
-    
     st.divider()
     
     # ===== 페어 트레이딩 신호등 섹션 =====
@@ -977,68 +1306,88 @@ def main():
 
     # 페어 트레이딩 설명 업데이트
     with st.expander("📚 페어 트레이딩 5단계 전략 설명", expanded=False):
-        st.markdown("""
-        ## 신호 단계 설명
-        
-        - 🟢🟢 **강력매수**: 극단적 저평가, 높은 확신도
-        - 🟢 **매수**: 명확한 저평가 신호
-        - 🟡 **중립**: 정상 범위, 대기
-        - 🔴 **매도**: 명확한 고평가 신호
-        - 🔴🔴 **강력매도**: 극단적 고평가, 높은 확신도
-        
-        ---
-        
-        ### 1. 금-은 페어 트레이딩
-        - **🟢🟢 강력**: 금은비율 > 90 또는 < 60
-        - **🟢/🔴 일반**: 금은비율 82-90 또는 60-68
-        - **🟡 중립**: 금은비율 68-82 (정상)
-        - **역사적 평균**: 약 75
-        
-        ### 2. VIX 채권-주식 페어
-        - **🟢🟢 주식 강력매수**: VIX > 35 (극도의 공포)
-        - **🟢 주식 매수**: VIX 25-35 (높은 공포)
-        - **🟡 중립**: VIX 15-25 (정상)
-        - **🔴 주식 매도**: VIX 12-15 (낮은 공포)
-        - **🔴🔴 주식 강력매도**: VIX < 12 (극도의 낙관)
-        
-        ### 3. 달러-엔 캐리 트레이드
-        - **🟢🟢 엔화 강력매수**: USD/JPY > 160 (엔화 극약세)
-        - **🟢 엔화 매수**: USD/JPY 152-160
-        - **🟡 중립**: USD/JPY 142-152 (정상)
-        - **🔴 달러 매수**: USD/JPY 135-142
-        - **🔴🔴 달러 강력매수**: USD/JPY < 135 (캐리 청산 완료)
-        
-        ### 4. S&P-나스닥 페어
-        - **🟢🟢 S&P 강력매수**: 격차 > +3.0%p (기술주 극과열)
-        - **🟢 S&P 매수**: 격차 +1.5 ~ +3.0%p
-        - **🟡 중립**: 격차 -1.5 ~ +1.5%p (균형)
-        - **🔴 나스닥 매수**: 격차 -3.0 ~ -1.5%p
-        - **🔴🔴 나스닥 강력매수**: 격차 < -3.0%p (기술주 극약세)
-        """)
+        st.markdown(_STRATEGY_MD)
+
+    # 로드 타이밍/데이터 소스: 페이지 맨 아래가 아니라 실시간 영역 끝에 둠
+    # (새로고침은 이 영역만 다시 실행하므로 여기 있어야 방금 기록한 타이밍이 바로 반영됨)
+    st.divider()
+    ss = st.session_state
+    started = ss.get('refresh_started_at')
+    parts = (
+        f"시작: {started}" if started else None,
+        f"완료: {ss['refresh_finished_at']}",
+        f"소요: {ss['refresh_elapsed_sec']}s",
+    )
+    timing_text = " | ".join(p for p in parts if p)
+    st.caption(f"🕐 데이터 로드 타이밍: {timing_text} | 📡 데이터 소스: Yahoo Finance")
+
+
+def main():
+    # 헤더
+    st.markdown('<h1 class="main-header">📊 Financial Indices Dashboard</h1>', unsafe_allow_html=True)
+    
+    # 사이드바
+    with st.sidebar:
+        st.header("⚙️ 설정")
+        # 단일 차트 시작일 선택
+        default_start = (datetime.now() - timedelta(days=365*2)).date()
+        single_chart_start = st.date_input("단일 차트 시작일", value=default_start)
+    
+    # 실시간 시세/페어 트레이딩 영역 (새로고침 시 이 영역만 다시 실행, 평소에는 백그라운드 스레드가 갱신한 스냅샷 사용)
+    _start_warmer()
+    live_market_section()
 
+    # 과거 차트 섹션
     st.divider()
+    st.subheader("📉 과거 차트 (5년 / 3년)")
 
+    def render_history_tab(years: int):
+        # 모든 심볼의 히스토리를 먼저 가져온 뒤 그립니다 (로딩 에러 방지)
+        with st.spinner(f"{years}년 데이터 불러오는 중..."):
+            fig, missing = build_history_figure(years)
+        if missing:
+            st.warning("데이터 없음: " + ", ".join(missing))
+        st.plotly_chart(fig, use_container_width=True)
+
+    tab5, tab3 = st.tabs(["5년", "3년"])
+    with tab5:
+        render_history_tab(5)
+    with tab3:
+        render_history_tab(3)
 
+    
+    
     # 하단 정보
     st.divider()
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # 로드 타이밍 정보 표시
-        started = st.session_state.get('refresh_started_at')
-        finished = st.session_state.get('refresh_finished_at')
-        elapsed = st.session_state.get('refresh_elapsed_sec')
-        timing = []
-        if started:
-            timing.append(f"시작: {started}")
-        if finished:
-            timing.append(f"완료: {finished}")
-        if elapsed is not None:
-            timing.append(f"소요: {elapsed}s")
-        timing_text = " | ".join(timing) if timing else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        st.info(f"🕐 데이터 로드 타이밍: {timing_text}")
-    with col2:
-        st.info("📡 데이터 소스: Yahoo Finance")
+    # 전체 지수 합산 차트 (사용자 지정 시작일, 기준=100)
+    st.subheader("🧩 모든 모니터링 지수: 단일 차트 (기준=100)")
+
+    with st.spinner("모든 지수 히스토리 로딩 중..."):
+        fig_all = build_rebased_figure(single_chart_start.isoformat())
+
+    if fig_all is None:
+        st.warning("모든 지수 히스토리를 불러오지 못했습니다.")
+    else:
+        # 하이라이트 선택 컨트롤
+        highlight_options = [trace['name'] for trace in fig_all['data']]
+        selected_highlights = st.multiselect(
+            "하이라이트 지수 선택 (선택 시 나머지는 회색 처리)", 
+            options=highlight_options, 
+            default=[]
+        )
+
+        # 캐시된 figure 명세 사본의 trace dict에 하이라이트 스타일만 덧입힘
+        if selected_highlights:
+            for trace in fig_all['data']:
+                if trace['name'] not in selected_highlights:
+                    trace['line'] = {**trace.get('line', {}), 'color': '#cccccc', 'width': 1}
+                    trace['opacity'] = 0.3
+
+        st.plotly_chart(fig_all, use_container_width=True)
+        
+        # 사용 팁 추가
+        st.info("💡 **사용 팁**: 차트 위에 마우스를 올리면 세로선/가로선이 표시되며, 모든 지수의 해당 시점 값을 동시에 확인할 수 있습니다.")
+
 
 if __name__ == "__main__":
     main()